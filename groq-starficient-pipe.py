@@ -61,42 +61,285 @@ The class
 
 from __future__ import annotations
 
+import asyncio
+import gzip
+import importlib.util
 import logging
 import os
+import re
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import (
     Any,
+    AsyncIterator,
     Dict,
     Generator,
     Iterator,
     List,
     Optional,
+    Tuple,
     Union,
 )
 
 import requests
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:  # optional Aho–Corasick automaton for multi-substring exclusion
+    import ahocorasick
+except ImportError:  # pragma: no cover - depends on the host environment
+    ahocorasick = None
+
+try:  # optional fast JSON codec
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # pragma: no cover - depends on the host environment
+    import json
+
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+try:  # optional async transport for ``Pipe.pipe``
+    import httpx
+except ImportError:  # pragma: no cover - depends on the host environment
+    httpx = None  # type: ignore[assignment]
 
 # ────────────────────────────────────────────────────────────────────────
 # Configuration constants
 # ────────────────────────────────────────────────────────────────────────
 API_BASE_URL = "https://api.groq.com/openai/v1"
 REQUEST_TIMEOUT = 60  # seconds
+MODEL_CACHE_TTL = 600  # seconds before the model list is fetched again
+SSE_READ_SIZE = 65536  # max bytes pulled from the socket per stream read
+GZIP_MIN_BYTES = 4096  # smaller bodies are not worth compressing
 EXCLUDE_SUBSTRINGS: tuple[str, ...] = ("tts", "whisper")  # never expose
+POOL_CONNECTIONS = 32  # distinct hosts kept in the pool manager
+POOL_MAXSIZE = 64  # sockets kept per host
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.3  # seconds, doubled after each attempt
+RETRY_STATUSES = (429, 502, 503, 504)
+BATCH_MAX_WORKERS = 16  # concurrent requests in ``pipe_batch``
+BATCH_RATE_LIMIT = 8.0  # requests per second issued by ``pipe_batch``
+BATCH_COMPLETION_WINDOW = "24h"  # Batch API processing window
+BATCH_POLL_MAX_INTERVAL = 60.0  # seconds, cap for the polling backoff
+BATCH_POLL_TIMEOUT = 24 * 3600.0  # seconds, matches BATCH_COMPLETION_WINDOW
+_BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+ASYNC_MAX_CONNECTIONS = 64
+ASYNC_MAX_KEEPALIVE = 32
+ASYNC_KEEPALIVE_EXPIRY = 75.0  # seconds an idle async connection is kept
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+_NO_API_KEY_ERROR = "Error: GROQ_API_KEY environment variable not set."
 LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 
-logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+# no basicConfig here: handler / level setup belongs to the host (WebUI)
 LOGGER = logging.getLogger("GroqPipe")
 
+if not EXCLUDE_SUBSTRINGS:
+    # an empty alternation / automaton would match (or break on) everything
+
+    def _is_excluded(model_id: str) -> bool:
+        """
+        True if ``model_id`` contains any of ``EXCLUDE_SUBSTRINGS``.
+        """
+        return False
+
+elif ahocorasick is not None:
+    _EXCLUDE_AUTOMATON = ahocorasick.Automaton()
+    for _word in EXCLUDE_SUBSTRINGS:
+        _EXCLUDE_AUTOMATON.add_word(_word, _word)
+    _EXCLUDE_AUTOMATON.make_automaton()
+
+    def _is_excluded(model_id: str) -> bool:
+        """
+        True if ``model_id`` contains any of ``EXCLUDE_SUBSTRINGS``.
+        """
+        return next(_EXCLUDE_AUTOMATON.iter(model_id), None) is not None
+
+else:
+    _EXCLUDE_RE = re.compile("|".join(map(re.escape, EXCLUDE_SUBSTRINGS)))
+
+    def _is_excluded(model_id: str) -> bool:
+        """
+        True if ``model_id`` contains any of ``EXCLUDE_SUBSTRINGS``.
+        """
+        return _EXCLUDE_RE.search(model_id) is not None
+
+
+# shared by the requests adapter and the httpx transport (see _TunedAdapter)
+_SOCKET_OPTIONS = (
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+)
+
+
+class _TunedAdapter(HTTPAdapter):
+    """
+    ``HTTPAdapter`` whose pooled sockets disable Nagle's algorithm and enable
+    TCP keep-alive.
+
+    ``TCP_NODELAY`` stops small JSON POSTs from waiting up to ~40 ms to be
+    coalesced; it is set explicitly rather than relying on urllib3's
+    defaults.  Keep-alive lets idle connections to Groq survive NAT /
+    load-balancer timeouts.
+    """
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        kwargs["socket_options"] = list(_SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+
+class _RequestBody(BaseModel):
+    """
+    Required fields of a chat-completion body; anything else passes through.
+    """
+
+    # strict: ``stream: 1`` or ``"false"`` must not pass, since ``pipe`` tests
+    # ``stream is True`` and forwards the raw value to Groq
+    model_config = ConfigDict(extra="allow", strict=True)
+
+    model: str
+    stream: bool
+    messages: List[Dict[str, Any]]
+
+
+_REQUEST_ADAPTER = TypeAdapter(_RequestBody)
+
+
+class _SSEBatcher:
+    """
+    Split a byte stream into complete SSE events and merge them into batches.
+
+    Events are split on ``b"\\n\\n"`` so every blob starts with ``data:``.
+    The first event is released at once, and pending events are released
+    whenever a read comes back short (the socket is drained), so nothing
+    waits for data the server has not sent yet.  Only while reads return
+    full buffers back-to-back are events merged, up to ``max_events`` events
+    or ``max_wait`` seconds.
+    """
+
+    def __init__(self, max_events: int, max_wait: float) -> None:
+        self.max_events = max(1, max_events)
+        self.max_wait = max_wait
+        self._buf = bytearray()
+        self._out = bytearray()
+        self._events = 0
+        self._started = 0.0
+        self._first = True
+
+    def feed(self, data: bytes, drained: bool) -> Optional[bytes]:
+        """
+        Add one read's ``data``; return a blob to yield now, if any.
+        """
+        buf = self._buf
+        buf += data
+        end = buf.rfind(b"\n\n")
+        if end != -1:
+            end += 2
+            if not self._events:
+                self._started = time.monotonic()
+            self._events += buf.count(b"\n\n", 0, end)
+            self._out += buf[:end]
+            del buf[:end]
+        if not self._out:
+            return None
+        if (
+            self._first
+            or drained
+            or self._events >= self.max_events
+            or time.monotonic() - self._started >= self.max_wait
+        ):
+            return self._take()
+        return None
+
+    def close(self) -> Optional[bytes]:
+        """
+        Return whatever is still pending at end of stream, if anything.
+        """
+        if self._buf.strip():
+            self._out += self._buf
+        self._buf.clear()
+        return self._take() if self._out else None
+
+    def _take(self) -> bytes:
+        blob = bytes(self._out)
+        self._out.clear()
+        self._events = 0
+        self._first = False
+        return blob
+
+
+class _TokenBucket:
+    """
+    Thread-safe token bucket that paces callers to ``rate`` calls per second.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Block until a token is available, then consume it.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._stamp) * self.rate
+                )
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
 
 class Pipe:
     """
     Lightweight wrapper around Groq’s ``/chat/completions`` endpoint.
 
     The class is instantiated once by Open WebUI and then used as a
-    long-lived object.  A ``requests.Session`` is therefore kept around for
-    TCP connection reuse.
+    long-lived object.  ``pipe`` is a coroutine backed by a shared
+    ``httpx.AsyncClient`` (HTTP/2 when ``h2`` is installed), so concurrent
+    WebUI requests are multiplexed over a single TLS connection; a
+    ``requests.Session`` serves the blocking paths (model list, batches).
     """
 
+    # fixed attribute set: skips the per-instance ``__dict__`` lookups
+    __slots__ = (
+        "type",
+        "id",
+        "name",
+        "base_url",
+        "valves",
+        "_chat_url",
+        "_models_url",
+        "_session",
+        "_aclient",
+        "_aclient_loop",
+        "_auth_key",
+        "_model_cache",
+        "_model_set",
+        "_pipes_cache",
+        "_valid_models_msg",
+        "_cache_ts",
+        "_cache_gen",
+        "_cache_lock",
+        "_executor",
+        "_bucket",
+    )
+
     # ─────────────────────────── secrets / valves ──────────────────────
     class Valves(BaseModel):
         """
@@ -107,6 +350,27 @@ class Pipe:
             default=os.getenv("GROQ_API_KEY", ""),
             description="Create / copy a key at https://console.groq.com/keys",
         )
+        SSE_BATCH_LINES: int = Field(
+            default=8,
+            description=(
+                "Max streamed events merged into one chunk sent to WebUI while "
+                "data arrives back-to-back; a drained socket flushes at once."
+            ),
+        )
+        SSE_BATCH_MS: int = Field(
+            default=20,
+            description=(
+                "Max milliseconds events are merged while data arrives "
+                "back-to-back; a drained socket flushes at once."
+            ),
+        )
+        GZIP_REQUESTS: bool = Field(
+            default=False,
+            description=(
+                "Gzip request bodies larger than 4 KiB (Content-Encoding: gzip). "
+                "Only enable if the endpoint and any proxy in between accept it."
+            ),
+        )
 
     # ────────────────────────────── init ───────────────────────────────
     def __init__(self) -> None:
@@ -114,9 +378,74 @@ class Pipe:
         self.id = "groq"  # prefix used by Open WebUI
         self.name = "groq/"
         self.base_url = API_BASE_URL
+        self._chat_url = f"{self.base_url}/chat/completions"
+        self._models_url = f"{self.base_url}/models"
         self.valves = self.Valves()
         self._session = requests.Session()
+        retry = Retry(
+            total=RETRY_TOTAL,
+            read=0,  # a read error/timeout may mean Groq is already generating;
+            other=0,  # re-sending would block again and bill a duplicate
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=("GET", "POST"),
+            raise_on_status=False,  # hand the last response back to ``pipe``
+        )
+        self._session.mount(
+            "https://",
+            _TunedAdapter(
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=retry,
+                pool_block=False,
+            ),
+        )
+        self._session.headers["Content-Type"] = "application/json"
+        self._aclient: Optional["httpx.AsyncClient"] = None  # created lazily
+        self._aclient_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._auth_key: Optional[str] = None  # key the headers were built from
         self._model_cache: Optional[List[str]] = None  # populated on demand
+        self._model_set: Optional[frozenset[str]] = None  # O(1) membership
+        # (model list, payload built from it) – compared by identity
+        self._pipes_cache: Optional[Tuple[List[str], List[Dict[str, str]]]] = None
+        # (model list, joined text) for error messages – built on first error
+        self._valid_models_msg: Optional[Tuple[List[str], str]] = None
+        self._cache_ts = 0.0  # time.monotonic() of the last model refresh
+        self._cache_gen = 0  # bumped by _invalidate() to void in-flight fetches
+        self._cache_lock = threading.Lock()  # serialises /models fetches
+        self._executor = ThreadPoolExecutor(
+            max_workers=BATCH_MAX_WORKERS, thread_name_prefix="groq-batch"
+        )
+        self._bucket = _TokenBucket(BATCH_RATE_LIMIT)
+        self._refresh_auth_header()
+        # warm the model cache – and with it DNS, TCP and TLS to Groq – so
+        # the first user request never waits on either.  Without an env key
+        # WebUI supplies it via the valves later, and a fetch now would fail.
+        if self.valves.API_KEY:
+            threading.Thread(
+                target=self._fetch_models_once, name="groq-models-warmup", daemon=True
+            ).start()
+
+    def _refresh_auth_header(self) -> None:
+        """
+        Re-apply the bearer header if ``valves.API_KEY`` has changed.
+
+        WebUI swaps ``self.valves`` after construction (and whenever the
+        user edits them), so the key is compared on every call; the header
+        itself is only rebuilt when it differs.  A changed key also drops
+        the model cache, which may have been filled with the fallback list.
+        """
+        api_key = self.valves.API_KEY
+        if api_key == self._auth_key:
+            return
+
+        bearer = f"Bearer {api_key}"
+        self._session.headers["Authorization"] = bearer
+        if self._aclient is not None:
+            self._aclient.headers["Authorization"] = bearer
+        if self._auth_key is not None:
+            self._invalidate()
+        self._auth_key = api_key
 
     # ──────────────────────────── model list ───────────────────────────
     @staticmethod
@@ -149,48 +478,185 @@ class Pipe:
             "qwen/qwen3-32b",
         ]
 
+    def _invalidate(self) -> None:
+        """
+        Expire the cached model list and the derived ``pipes()`` payload.
+
+        The old values stay readable until the next fetch replaces them, so
+        concurrent readers never observe a half-cleared cache.  Bumping
+        ``_cache_gen`` also stops a fetch already in flight (e.g. one made
+        with a previous API key) from marking its result as fresh.
+        """
+        self._cache_gen += 1
+        self._cache_ts = float("-inf")
+
+    def _cache_fresh(self) -> bool:
+        """
+        True if the model list is populated and younger than the TTL.
+        """
+        return (
+            self._model_cache is not None
+            and time.monotonic() - self._cache_ts <= MODEL_CACHE_TTL
+        )
+
     def _fetch_models_once(self) -> List[str]:
         """
-        Fetch ``GET /models`` exactly once per process, cache the result.
+        Return the cached model list, fetching ``GET /models`` if needed.
+
+        Only a cold cache blocks: the first caller performs the request
+        while the others wait on ``_cache_lock`` and reuse its result.  An
+        entry older than ``MODEL_CACHE_TTL`` is still returned immediately
+        and refreshed on a background thread.
 
         Falls back to ``_hardcoded_models`` if the request fails.
         Excludes any model containing a substring in ``EXCLUDE_SUBSTRINGS``.
         """
-        if self._model_cache is not None:
+        self._refresh_auth_header()
+        cache = self._model_cache
+        if cache is not None:
+            if not self._cache_fresh():
+                self._schedule_refresh()
+            return cache
+
+        with self._cache_lock:
+            # re-check freshness, not just presence: a fetch that finished
+            # while we waited may have been voided by ``_invalidate()``
+            if not self._cache_fresh():
+                self._load_models()
             return self._model_cache
 
+    def _schedule_refresh(self) -> None:
+        """
+        Refresh the model list in the background unless a fetch is running.
+        """
+        if not self._cache_lock.acquire(blocking=False):
+            return  # another thread is already fetching
+
+        def refresh() -> None:
+            try:
+                if not self._cache_fresh():
+                    self._load_models()
+            finally:
+                self._cache_lock.release()
+
+        try:
+            threading.Thread(
+                target=refresh, name="groq-models-refresh", daemon=True
+            ).start()
+        except RuntimeError:  # cannot start a thread, e.g. at shutdown
+            self._cache_lock.release()
+
+    def _load_models(self) -> None:
+        """
+        Populate the model caches; callers must hold ``_cache_lock``.
+
+        If ``_invalidate()`` runs while the request is in flight the result
+        is still published (a cold cache needs *something*) but left
+        expired, so the next reader triggers another refresh.
+        """
+        generation = self._cache_gen
         try:
-            LOGGER.info("Fetching model list from Groq …")
+            LOGGER.debug("Fetching model list from Groq …")
             response = self._session.get(
-                f"{self.base_url}/models",
-                headers={"Authorization": f"Bearer {self.valves.API_KEY}"},
+                self._models_url,
                 timeout=REQUEST_TIMEOUT,
             )
             response.raise_for_status()
-            remote_models = [m["id"] for m in response.json().get("data", [])]
-            self._model_cache = [
-                m for m in remote_models if not any(x in m for x in EXCLUDE_SUBSTRINGS)
+            payload = _json_loads(response.content)
+            models = [
+                mid
+                for m in payload.get("data", ())
+                if (mid := m["id"]) and not _is_excluded(mid)
             ]
-            LOGGER.info("Cached %d models from Groq.", len(self._model_cache))
+            LOGGER.info("Cached %d models from Groq.", len(models))
         except Exception as exc:  # pylint: disable=broad-except
             LOGGER.warning("Model refresh failed (%s); using hard-coded list.", exc)
-            self._model_cache = [
-                m
-                for m in self._hardcoded_models()
-                if not any(x in m for x in EXCLUDE_SUBSTRINGS)
-            ]
+            models = [m for m in self._hardcoded_models() if not _is_excluded(m)]
 
-        return self._model_cache
+        # derived views first, so a reader that sees the new list sees them too
+        self._model_set = frozenset(models)
+        self._model_cache = models
+        if generation == self._cache_gen:
+            self._cache_ts = time.monotonic()
 
     # Public helper for Open WebUI
     def pipes(self) -> List[Dict[str, str]]:
         """
         Return the model list in Open WebUI’s expected ``[{id, name}, …]`` format.
+
+        The list is built once per model refresh and returned by reference.
+        It is stored together with the model list it came from, so a payload
+        built from a list that a concurrent refresh has just replaced is
+        rebuilt on the next call instead of being served for a whole TTL.
         """
-        return [{"id": m, "name": m} for m in self._fetch_models_once()]
+        models = self._fetch_models_once()
+        cached = self._pipes_cache
+        if cached is None or cached[0] is not models:
+            cached = self._pipes_cache = (
+                models,
+                [{"id": m, "name": m} for m in models],
+            )
+        return cached[1]
 
-    # ───────────────────────── main request ────────────────────────────
-    def pipe(
+    # ───────────────────────── validation ──────────────────────────────
+    def _prepare(self, body: Dict[str, Any]) -> Union[str, Dict[str, Any]]:
+        """
+        Validate ``body`` and normalise its model id.
+
+        Returns the payload to send (``body`` itself unless the model id had
+        to be rewritten), or a human-readable error string.
+        """
+        try:
+            _REQUEST_ADAPTER.validate_python(body)
+        except ValidationError as exc:
+            return f"Error: invalid request body: {exc}"
+
+        if not self.valves.API_KEY:
+            return _NO_API_KEY_ERROR
+
+        # ---------- resolve the id, stripping any WebUI '<prefix>.' -----
+        self._fetch_models_once()
+        allowed = self._model_set
+        model_id = body["model"]
+        _, sep, tail = model_id.partition(".")
+        # ids such as 'llama-3.1-8b-instant' contain dots themselves, so the
+        # stripped form is only used when it is a known model
+        model_name = tail if sep and tail in allowed else model_id
+        if model_name not in allowed:
+            return (
+                f"Error: model '{model_name}' is not supported.\n"
+                f"Valid models: {self._valid_models_text()}"
+            )
+
+        # copy rather than mutate: the caller may reuse its body
+        return body if model_name is model_id else {**body, "model": model_name}
+
+    def _valid_models_text(self) -> str:
+        """
+        Comma-joined model list for error messages, built once per refresh.
+        """
+        models = self._model_cache or []
+        cached = self._valid_models_msg
+        if cached is None or cached[0] is not models:
+            cached = self._valid_models_msg = (models, ", ".join(models))
+        return cached[1]
+
+    def _encode_body(
+        self,
+        body: Dict[str, Any],
+    ) -> Tuple[bytes, Optional[Dict[str, str]]]:
+        """
+        Serialise ``body`` and gzip it when enabled and large enough.
+
+        Returns the request bytes and any extra headers they need.
+        """
+        payload = _json_dumps(body)
+        if self.valves.GZIP_REQUESTS and len(payload) > GZIP_MIN_BYTES:
+            return gzip.compress(payload, compresslevel=1), {"Content-Encoding": "gzip"}
+        return payload, None
+
+    # ───────────────────────── sync request ────────────────────────────
+    def _pipe_sync(
         self,
         body: Dict[str, Any],
     ) -> Union[
@@ -200,7 +666,10 @@ class Pipe:
         Iterator[bytes],
     ]:
         """
-        Execute ``POST /chat/completions``.
+        Execute ``POST /chat/completions`` on the blocking ``requests`` session.
+
+        Used by ``pipe_batch`` worker threads, and by ``pipe`` when ``httpx``
+        is not installed.
 
         Parameters
         ----------
@@ -215,57 +684,463 @@ class Pipe:
             • str: human-readable error message
         """
 
-        # ---------- basic validation -----------------------------------
-        if "model" not in body or "stream" not in body:
-            return "Error: request body must contain 'model' and 'stream'."
-
-        if not self.valves.API_KEY:
-            return "Error: GROQ_API_KEY environment variable not set."
-
-        # ---------- strip any '<prefix>.' that WebUI adds --------------
-        if "." in body["model"]:
-            body["model"] = body["model"].split(".", 1)[1]
-
-        model_name = body["model"]
-        allowed_models = self._fetch_models_once()
-        if model_name not in allowed_models:
-            return (
-                f"Error: model '{model_name}' is not supported.\n"
-                f"Valid models: {', '.join(allowed_models)}"
-            )
+        prepared = self._prepare(body)
+        if isinstance(prepared, str):
+            return prepared
+        body = prepared
 
         # ---------- perform request ------------------------------------
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.valves.API_KEY}",
-            "Content-Type": "application/json",
-        }
+        url = self._chat_url
+        stream_flag = body["stream"] is True
 
         try:
+            payload, headers = self._encode_body(body)
             response = self._session.post(
                 url=url,
-                json=body,
+                data=payload,
                 headers=headers,
-                stream=bool(body["stream"]),
+                stream=stream_flag,
                 timeout=REQUEST_TIMEOUT,
             )
-            response.raise_for_status()
-            return response.iter_lines() if body["stream"] else response.json()
+            status = response.status_code
+            if status >= 400:  # slow path only: build the message here
+                msg = f"HTTP {status} calling {url}: {response.reason}\n{response.text}"
+                if status == 404:
+                    msg += "\n(404 usually means an unknown model id.)"
+                return msg
+
+            if stream_flag:
+                return self._batched_sse(response)
+            return _json_loads(response.content)
+
+        except Exception as exc:  # pylint: disable=broad-except
+            return f"Unhandled error: {exc}"
+
+    def _new_batcher(self) -> _SSEBatcher:
+        """
+        Return an ``_SSEBatcher`` configured from the ``SSE_BATCH_*`` valves.
+        """
+        return _SSEBatcher(self.valves.SSE_BATCH_LINES, self.valves.SSE_BATCH_MS / 1000)
+
+    def _batched_sse(
+        self,
+        response: requests.Response,
+        chunk_size: int = SSE_READ_SIZE,
+    ) -> Generator[bytes, None, None]:
+        """
+        Yield batched SSE events from a streamed ``requests`` response.
+
+        See ``_SSEBatcher`` for the batching rules; a read shorter than
+        ``chunk_size`` counts as a drained socket.
+        """
+        read1 = getattr(response.raw, "read1", None)  # urllib3 >= 2.3
+        if read1 is not None:
+            chunks: Iterator[bytes] = iter(
+                lambda: read1(chunk_size, decode_content=True), b""
+            )
+        else:
+            # chunk sizes are unknown here, so treat every chunk as drained
+            chunks = response.iter_content(chunk_size=None)
+
+        batcher = self._new_batcher()
+        try:
+            for data in chunks:
+                blob = batcher.feed(data, read1 is None or len(data) < chunk_size)
+                if blob is not None:
+                    yield blob
+            blob = batcher.close()
+            if blob is not None:
+                yield blob
+        finally:
+            response.close()
+
+    # ───────────────────────── batch request ───────────────────────────
+    def pipe_batch(
+        self,
+        bodies: List[Dict[str, Any]],
+    ) -> List[Union[str, Dict[str, Any]]]:
+        """
+        Run several non-streamed requests concurrently from synchronous code.
+
+        Requests are fanned out over a shared thread pool (and therefore the
+        shared session) and paced to ``BATCH_RATE_LIMIT`` requests per second
+        so a large batch does not trip Groq's rate limits.
+
+        Returns
+        -------
+        list
+            One result per body, in input order, each as ``_pipe_sync``
+            returns it.  Bodies with ``stream`` set yield an error string.
+        """
+        return list(self._executor.map(self._pipe_throttled, bodies))
+
+    def _pipe_throttled(self, body: Dict[str, Any]) -> Union[str, Dict[str, Any]]:
+        """
+        ``_pipe_sync`` behind the batch token bucket; rejects streamed bodies.
+        """
+        if body.get("stream"):
+            return "Error: pipe_batch only supports non-streamed requests."
+        self._bucket.acquire()
+        return self._pipe_sync(body)  # type: ignore[return-value]
+
+    # ─────────────────────── offline batch request ─────────────────────
+    def pipe_offline_batch(
+        self,
+        bodies: List[Dict[str, Any]],
+        poll_interval: float = 5.0,
+        timeout: float = BATCH_POLL_TIMEOUT,
+    ) -> Union[str, List[Union[str, Dict[str, Any]]]]:
+        """
+        Submit non-urgent requests through Groq's Batch API and wait for them.
+
+        The bodies are uploaded as one JSONL file, processed asynchronously
+        by Groq (at a discount and outside the real-time rate limits) and
+        polled with exponential backoff starting at ``poll_interval``.  This
+        blocks until the batch finishes (or ``timeout`` seconds pass), so it
+        is meant for offline/bulk jobs, never for interactive WebUI requests.
+
+        Returns
+        -------
+        list | str
+            • list: one result per body, in input order – a response dict,
+              or an error string for requests that failed
+            • str: human-readable error message if the batch itself failed
+        """
+        payloads = []
+        for index, body in enumerate(bodies):
+            if body.get("stream"):
+                return f"Error: body {index}: offline batches cannot stream."
+            prepared = self._prepare({"stream": False, **body})
+            if isinstance(prepared, str):
+                return f"Error: body {index}: {prepared}"
+            payloads.append(prepared)
+        if not payloads:
+            return []
+
+        try:
+            job_id = self._submit_batch_file(payloads)
+            job = self._poll_batch(job_id, poll_interval, timeout)
+            if not (job.get("output_file_id") or job.get("error_file_id")):
+                return f"Error: batch {job_id} ended with status '{job['status']}'."
+            return self._download_batch_results(job, len(payloads))
+
+        except TimeoutError as exc:
+            return f"Error: {exc}"
 
         except requests.exceptions.HTTPError as exc:
-            msg = (
-                f"HTTP {response.status_code} calling {url}: {exc}\n" f"{response.text}"
+            return f"HTTP error during offline batch: {exc}\n{exc.response.text}"
+
+        except Exception as exc:  # pylint: disable=broad-except
+            return f"Unhandled error: {exc}"
+
+    def _submit_batch_file(self, bodies: List[Dict[str, Any]]) -> str:
+        """
+        Upload ``bodies`` as a JSONL batch file and create the batch job.
+
+        Returns the batch id; each line's ``custom_id`` is its input index.
+        """
+        lines = b"\n".join(
+            _json_dumps(
+                {
+                    "custom_id": str(index),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": body,
+                }
             )
-            if response.status_code == 404:
-                msg += "\n(404 usually means an unknown model id.)"
-            return msg
+            for index, body in enumerate(bodies)
+        )
+        response = self._post_once(
+            f"{self.base_url}/files",
+            files={"file": ("batch.jsonl", lines, "application/jsonl")},
+            data={"purpose": "batch"},
+            headers={"Content-Type": None},  # let requests set the boundary
+        )
+        response.raise_for_status()
+        file_id = _json_loads(response.content)["id"]
+
+        response = self._post_once(
+            f"{self.base_url}/batches",
+            data=_json_dumps(
+                {
+                    "input_file_id": file_id,
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": BATCH_COMPLETION_WINDOW,
+                }
+            ),
+        )
+        response.raise_for_status()
+        job_id = _json_loads(response.content)["id"]
+        LOGGER.info("Submitted offline batch %s (%d requests).", job_id, len(bodies))
+        return job_id
+
+    def _post_once(
+        self,
+        url: str,
+        headers: Optional[Dict[str, Optional[str]]] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        POST with the session's headers but without its retry policy.
+
+        For non-idempotent calls (file upload, batch creation): a retried
+        502/504 after Groq accepted the first attempt would create – and
+        bill – a duplicate.  A ``None`` header value removes that header.
+        """
+        merged = {**self._session.headers, **(headers or {})}
+        return requests.post(
+            url,
+            headers={k: v for k, v in merged.items() if v is not None},
+            timeout=REQUEST_TIMEOUT,
+            **kwargs,
+        )
+
+    def _poll_batch(
+        self,
+        job_id: str,
+        poll_interval: float,
+        timeout: float,
+    ) -> Dict[str, Any]:
+        """
+        Poll ``GET /batches/{id}`` with exponential backoff until it finishes.
+
+        Raises ``TimeoutError`` if it is still running after ``timeout`` s.
+        """
+        deadline = time.monotonic() + timeout
+        delay = poll_interval
+        while True:
+            response = self._session.get(
+                f"{self.base_url}/batches/{job_id}",
+                timeout=REQUEST_TIMEOUT,
+            )
+            response.raise_for_status()
+            job = _json_loads(response.content)
+            if job["status"] in _BATCH_TERMINAL_STATUSES:
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"batch {job_id} still '{job['status']}' after {timeout:g} s."
+                )
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, BATCH_POLL_MAX_INTERVAL)
+
+    def _download_batch_results(
+        self,
+        job: Dict[str, Any],
+        count: int,
+    ) -> List[Union[str, Dict[str, Any]]]:
+        """
+        Download the output / error files of ``job`` and order them by input.
+        """
+        results: List[Union[str, Dict[str, Any]]] = [
+            "Error: no result returned for this request."
+        ] * count
+
+        for file_id in (job.get("output_file_id"), job.get("error_file_id")):
+            if not file_id:
+                continue
+            response = self._session.get(
+                f"{self.base_url}/files/{file_id}/content",
+                timeout=REQUEST_TIMEOUT,
+            )
+            response.raise_for_status()
+            for line in response.content.splitlines():
+                if not line.strip():
+                    continue
+                record = _json_loads(line)
+                result = record.get("response") or {}
+                if record.get("error") or result.get("status_code", 200) >= 400:
+                    detail = record.get("error") or result.get("body")
+                    results[int(record["custom_id"])] = f"Error: {detail}"
+                else:
+                    results[int(record["custom_id"])] = result["body"]
+
+        return results
+
+    # ───────────────────────── main request ────────────────────────────
+    def _get_aclient(self) -> "httpx.AsyncClient":
+        """
+        Return the shared ``httpx.AsyncClient`` for the running event loop.
+
+        One client is kept per event loop: its pooled connections belong to
+        the loop that opened them.  Open WebUI runs a single loop, so this is
+        created once.  Scripts that start a new loop per call (e.g. one
+        ``asyncio.run`` each) should ``await pipe.aclose()`` before the loop
+        ends; otherwise the client is replaced here and, if its loop is
+        still running, closed on that loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient is not None and self._aclient_loop is not loop:
+            old, old_loop = self._aclient, self._aclient_loop
+            if old_loop is not None and not old_loop.is_closed():
+                asyncio.run_coroutine_threadsafe(old.aclose(), old_loop)
+            else:
+                LOGGER.debug("Dropping async client of a closed event loop.")
+            self._aclient = None
+
+        if self._aclient is None:
+            # connect errors are retried by the transport, statuses by _asend
+            transport = httpx.AsyncHTTPTransport(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_keepalive_connections=ASYNC_MAX_KEEPALIVE,
+                    max_connections=ASYNC_MAX_CONNECTIONS,
+                    keepalive_expiry=ASYNC_KEEPALIVE_EXPIRY,
+                ),
+                retries=RETRY_TOTAL,
+                socket_options=_SOCKET_OPTIONS,
+            )
+            self._aclient = httpx.AsyncClient(
+                transport=transport,
+                timeout=REQUEST_TIMEOUT,
+                headers={
+                    "Authorization": f"Bearer {self.valves.API_KEY}",
+                    "Content-Type": "application/json",
+                },
+            )
+            self._aclient_loop = loop
+        return self._aclient
+
+    async def aclose(self) -> None:
+        """
+        Close the async client if it belongs to the running event loop.
+        """
+        if self._aclient is not None and self._aclient_loop is (
+            asyncio.get_running_loop()
+        ):
+            client, self._aclient, self._aclient_loop = self._aclient, None, None
+            await client.aclose()
+
+    async def pipe(
+        self,
+        body: Dict[str, Any],
+    ) -> Union[
+        str,
+        Dict[str, Any],
+        AsyncIterator[bytes],
+        Generator[bytes, None, None],
+    ]:
+        """
+        Execute ``POST /chat/completions``.
+
+        Open WebUI awaits ``pipe`` on its event loop.  Requests share one
+        ``httpx.AsyncClient`` so concurrent chats are multiplexed over a
+        single keep-alive (HTTP/2 when ``h2`` is installed) connection
+        instead of each blocking a worker thread.  Without ``httpx`` the
+        blocking ``_pipe_sync`` runs in the default executor instead.
+
+        Parameters
+        ----------
+        body : dict
+            The request payload expected by the OpenAI API.
+
+        Returns
+        -------
+        dict | async iterator | generator | str
+            • dict: normal non-streamed response
+            • async iterator of batched SSE bytes: when ``stream`` is
+              ``True`` (a plain generator on the ``httpx``-less path)
+            • str: human-readable error message
+        """
+        loop = asyncio.get_running_loop()
+        if httpx is None:
+            return await loop.run_in_executor(None, self._pipe_sync, body)
+
+        if not self.valves.API_KEY:
+            return _NO_API_KEY_ERROR  # before the fetch below, which would fail
+
+        if self._model_cache is None:
+            # cold cache: keep the blocking /models call off the event loop
+            await loop.run_in_executor(None, self._fetch_models_once)
+
+        prepared = self._prepare(body)
+        if isinstance(prepared, str):
+            return prepared
+        body = prepared
+
+        url = self._chat_url
+        client = self._get_aclient()
+
+        try:
+            stream_flag = body["stream"] is True
+            payload, headers = self._encode_body(body)
+            request = client.build_request(
+                "POST", url, content=payload, headers=headers
+            )
+            response = await self._asend(client, request, stream_flag)
+            status = response.status_code
+            if status >= 400:
+                await response.aread()
+                await response.aclose()
+                msg = (
+                    f"HTTP {status} calling {url}: "
+                    f"{response.reason_phrase}\n{response.text}"
+                )
+                if status == 404:
+                    msg += "\n(404 usually means an unknown model id.)"
+                return msg
+
+            if stream_flag:
+                return self._abatched_sse(response)
+            return _json_loads(response.content)
 
         except Exception as exc:  # pylint: disable=broad-except
             return f"Unhandled error: {exc}"
 
+    @staticmethod
+    async def _asend(
+        client: "httpx.AsyncClient",
+        request: "httpx.Request",
+        stream: bool,
+    ) -> "httpx.Response":
+        """
+        Send ``request``, retrying ``RETRY_STATUSES`` like the session does.
+
+        Up to ``RETRY_TOTAL`` retries; a numeric ``Retry-After`` header is
+        honoured (capped at ``REQUEST_TIMEOUT``), otherwise the delay doubles
+        from ``RETRY_BACKOFF``.  Read errors and timeouts are never retried,
+        since Groq may already be generating (and billing) the reply.
+        """
+        for attempt in range(RETRY_TOTAL):
+            response = await client.send(request, stream=stream)
+            if response.status_code not in RETRY_STATUSES:
+                return response
+            try:
+                delay = min(float(response.headers["Retry-After"]), REQUEST_TIMEOUT)
+            except (KeyError, ValueError):  # absent, or an HTTP-date
+                delay = RETRY_BACKOFF * 2**attempt
+            await response.aclose()
+            await asyncio.sleep(max(delay, 0.0))
+        return await client.send(request, stream=stream)
+
+    async def _abatched_sse(
+        self,
+        response: "httpx.Response",
+    ) -> AsyncIterator[bytes]:
+        """
+        Async twin of ``_batched_sse`` over ``response.aiter_bytes()``.
+
+        httpx hands over each network read (at most ``SSE_READ_SIZE`` bytes,
+        one frame on HTTP/2) as it arrives, so a shorter chunk counts as a
+        drained socket.
+        """
+        batcher = self._new_batcher()
+        try:
+            async for data in response.aiter_bytes():
+                blob = batcher.feed(data, len(data) < SSE_READ_SIZE)
+                if blob is not None:
+                    yield blob
+            blob = batcher.close()
+            if blob is not None:
+                yield blob
+        finally:
+            await response.aclose()
+
 
 # ───────────────────────────── demo / self-test ─────────────────────────────
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
     pipe = Pipe()
 
     demo_request = {
@@ -274,6 +1149,12 @@ if __name__ == "__main__":
         "stream": False,
     }
 
+    async def demo() -> Any:
+        try:
+            return await pipe.pipe(demo_request)
+        finally:
+            await pipe.aclose()
+
     print("Sending demo request …")
-    result = pipe.pipe(demo_request)
+    result = asyncio.run(demo())
     print("Result:\n", result)